@@ -14,31 +14,31 @@ Usage:
 
 import argparse
 import asyncio
-import calendar
+import contextlib
+import functools
+import hashlib
 import json
 import os
+import re
 import sys
+import time
 from datetime import date, datetime
 
 try:
-    from monarchmoney import MonarchMoney
+    import orjson
 except ImportError:
-    if "--json" in sys.argv:
-        print(json.dumps({"error": "monarchmoney not installed. Run: pip install -r requirements.txt",
-                          "code": "DEPENDENCY_MISSING"}))
-    else:
-        print("ERROR: monarchmoney is not installed.")
-        print("       Run: pip install -r requirements.txt")
-    sys.exit(1)
+    orjson = None
 
 DEFAULT_SESSION_FILE = "session.json"
 DEFAULT_LIMIT = 100
+CATEGORY_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".monarch", "category_cache")
+CATEGORY_CACHE_TTL = 86400  # seconds
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+AUTH_ERROR_RE = re.compile(r"unauthorized|401|403|forbidden|token|auth", re.IGNORECASE)
 
 
-def parse_args():
-    parser = argparse.ArgumentParser(
-        description="List transactions for a specific Monarch Money budget category"
-    )
+def add_arguments(parser: argparse.ArgumentParser):
+    """Register this command's options; shared with the monarch CLI subcommand."""
     parser.add_argument(
         "--category",
         required=True,
@@ -71,9 +71,35 @@ def parse_args():
         action="store_true",
         help="Dump raw API responses to stderr for troubleshooting",
     )
+    parser.add_argument(
+        "--debug-max-bytes",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Truncate each --debug JSON dump to N bytes (default: 0, no limit)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore the cached category list and fetch it fresh",
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="List transactions for a specific Monarch Money budget category"
+    )
+    add_arguments(parser)
     return parser.parse_args()
 
 
+@functools.lru_cache(maxsize=4)
+def _read_session(session_path: str, mtime: float) -> dict:
+    """Parse session.json once per process; mtime is the invalidation key."""
+    with open(session_path, "r") as f:
+        return json.load(f)
+
+
 def load_token(session_path: str) -> str:
     """Load the auth token from session.json."""
     if not os.path.exists(session_path):
@@ -81,8 +107,7 @@ def load_token(session_path: str) -> str:
             f"Session file not found: {session_path}\n"
             "Run 'python login.py' to create it."
         )
-    with open(session_path, "r") as f:
-        data = json.load(f)
+    data = _read_session(session_path, os.path.getmtime(session_path))
     token = data.get("token")
     if not token:
         raise ValueError(
@@ -92,9 +117,78 @@ def load_token(session_path: str) -> str:
     return token
 
 
+def session_cache_path(cache_dir: str, session_path: str) -> str:
+    """
+    Per-session cache file under cache_dir, keyed on the resolved session path
+    so another account's session file never reads this session's cache.
+    """
+    real_path = os.path.realpath(session_path)
+    key = hashlib.sha256(real_path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def load_category_cache(cache_path: str, session_mtime: float,
+                        ttl_seconds: int = CATEGORY_CACHE_TTL) -> dict | None:
+    """
+    Return cached categories_data if the cache file was written for this
+    session_mtime (i.e. not before a re-login) and is younger than ttl_seconds,
+    otherwise None. A missing or unreadable cache is just a miss.
+    """
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        fetched_at = datetime.fromisoformat(cached["fetched_at"]).timestamp()
+        if cached["session_mtime"] != session_mtime:
+            return None
+        categories_data = cached["categories_data"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if time.time() - fetched_at > ttl_seconds:
+        return None
+    return categories_data
+
+
+def save_category_cache(cache_path: str, session_mtime: float, categories_data: dict):
+    """Write categories_data to the cache file with a fetch timestamp."""
+    cached = {
+        "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        "session_mtime": session_mtime,
+        "categories_data": categories_data,
+    }
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(cached, f, default=str)
+    except OSError:
+        # Caching is best-effort; the lookup already succeeded
+        pass
+
+
+def encode_json(obj) -> bytes:
+    """Encode obj as indented UTF-8 JSON, using orjson when it is installed."""
+    if orjson is None:
+        return json.dumps(obj, indent=2, default=str).encode("utf-8")
+    return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+
+def write_json(obj, stream=None, max_bytes: int = 0):
+    """
+    Write obj as indented JSON straight to the stream's byte buffer.
+    If max_bytes > 0, output beyond that many bytes is cut off with a marker.
+    """
+    stream = stream or sys.stdout
+    data = encode_json(obj)
+    if 0 < max_bytes < len(data):
+        data = data[:max_bytes] + f"\n... [truncated {len(data) - max_bytes} bytes]".encode("utf-8")
+    # Flush pending text output so the raw bytes land after it
+    stream.flush()
+    stream.buffer.write(data)
+    stream.buffer.write(b"\n")
+    stream.flush()
+
+
 def is_auth_error(exc: Exception) -> bool:
-    msg = str(exc).lower()
-    return any(s in msg for s in ["unauthorized", "401", "403", "forbidden", "token", "auth"])
+    return AUTH_ERROR_RE.search(str(exc)) is not None
 
 
 def get_month_range(month_str: str | None) -> tuple[str, str]:
@@ -107,57 +201,85 @@ def get_month_range(month_str: str | None) -> tuple[str, str]:
             year, month = map(int, month_str.split("-"))
         except ValueError:
             raise ValueError(f"Invalid month format '{month_str}'. Use YYYY-MM (e.g. 2026-02).")
+        if not 1 <= month <= 12:
+            raise ValueError(f"Invalid month '{month_str}'. Month must be 01-12.")
     else:
         today = date.today()
         year, month = today.year, today.month
 
-    last_day = calendar.monthrange(year, month)[1]
+    # Table lookup plus a leap-day fix-up for February
+    last_day = DAYS_IN_MONTH[month - 1] + (
+        month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    )
     start = f"{year}-{month:02d}-01"
     end = f"{year}-{month:02d}-{last_day:02d}"
     return start, end
 
 
-def find_category(categories_data: dict, name: str, debug: bool) -> tuple[str | None, str, list]:
+def build_category_index(categories_data: dict, debug: bool) -> tuple[dict, list]:
     """
-    Case-insensitive search for a category by name.
-    Returns (category_id, matched_name, all_category_names).
+    Build a case-insensitive lookup over the enabled categories.
+    Returns ({name_lower: (category_id, name)}, active_categories).
     """
     categories = categories_data.get("categories", [])
     if debug:
         print(f"[DEBUG] Total categories returned: {len(categories)}", file=sys.stderr)
 
-    all_names = sorted(c.get("name", "") for c in categories if not c.get("isDisabled", False))
-    name_lower = name.lower()
+    # Filter disabled entries once; both the index and the not-found name list
+    # are derived from this list. Reversed so the first duplicate name wins.
+    active_categories = [c for c in categories if not c.get("isDisabled")]
+    by_lower_name = {
+        c.get("name", "").lower(): (c["id"], c.get("name", "")) for c in reversed(active_categories)
+    }
+    return by_lower_name, active_categories
+
+
+def available_names(active_categories: list) -> list:
+    """Sorted category names, used only to explain a failed lookup."""
+    return sorted(c.get("name", "") for c in active_categories)
 
-    for cat in categories:
-        if cat.get("isDisabled", False):
-            continue
-        if cat.get("name", "").lower() == name_lower:
-            return cat["id"], cat["name"], all_names
 
-    return None, name, all_names
+def find_category(by_lower_name: dict, name: str) -> tuple[str | None, str]:
+    """
+    Case-insensitive search for a category by name.
+    Returns (category_id, matched_name), or (None, name) if not found.
+    """
+    return by_lower_name.get(name.lower(), (None, name))
 
 
-def format_transactions(results: list) -> list:
-    """Normalize raw API transaction objects into a clean list of dicts."""
+def format_transactions(results: list) -> tuple[list, float, bool]:
+    """
+    Normalize raw API transaction objects into a clean list of dicts.
+    Returns (transactions, total_amount, has_pending), accumulated in one pass;
+    total_amount is already rounded to cents.
+    """
     out = []
+    total = 0.0
+    has_pending = False
     for txn in results:
-        merchant = (txn.get("merchant") or {}).get("name") or txn.get("plaidName") or ""
-        account = (txn.get("account") or {}).get("displayName") or ""
+        amount = round(abs(float(txn.get("amount") or 0)), 2)
+        # Null-check the nested objects directly rather than via `or {}`
+        m = txn.get("merchant")
+        merchant = (m.get("name") if m else None) or txn.get("plaidName") or ""
+        a = txn.get("account")
+        account = (a.get("displayName") if a else None) or ""
+        pending = bool(txn.get("pending", False))
+        total += amount
+        has_pending = has_pending or pending
         out.append({
             "date": txn.get("date", ""),
             "merchant": merchant,
-            "amount": round(abs(float(txn.get("amount") or 0)), 2),
+            "amount": amount,
             "account": account,
             "notes": txn.get("notes") or "",
-            "pending": bool(txn.get("pending", False)),
+            "pending": pending,
         })
     # Sort newest first
     out.sort(key=lambda x: x["date"], reverse=True)
-    return out
+    return out, round(total, 2), has_pending
 
 
-def print_console_report(transactions: list, category: str, month: str):
+def print_console_report(transactions: list, total: float, has_pending: bool, category: str, month: str):
     """Print a formatted aligned table to stdout."""
     width = 70
     print()
@@ -173,121 +295,218 @@ def print_console_report(transactions: list, category: str, month: str):
     print(f"  {'Date':<12} {'Merchant':<30} {'Account':<18} {'Amount':>9}")
     print(f"  {'-' * 12} {'-' * 30} {'-' * 18} {'-' * 9}")
 
-    for txn in transactions:
-        merchant = txn["merchant"][:29]
-        account = txn["account"][:17]
-        pending = " *" if txn["pending"] else ""
-        print(f"  {txn['date']:<12} {merchant:<30} {account:<18} ${txn['amount']:>8.2f}{pending}")
+    # Format every row with one bound method and emit them in a single write
+    row = "  {:<12} {:<30} {:<18} ${:>8.2f}{}\n".format
+    sys.stdout.write("".join(
+        row(t["date"], t["merchant"][:29], t["account"][:17], t["amount"], " *" if t["pending"] else "")
+        for t in transactions
+    ))
 
-    total = sum(t["amount"] for t in transactions)
     count = len(transactions)
     print(f"  {'-' * width}")
     print(f"  {count} transaction{'s' if count != 1 else ''}   Total: ${total:.2f}")
-    if any(t["pending"] for t in transactions):
+    if has_pending:
         print(f"  * = pending")
     print()
 
 
-async def run(args):
-    # Parse and validate month
+def require_monarchmoney(json_output: bool):
+    """
+    Import monarchmoney on first use rather than at module load, so --help and
+    argument errors don't pay for it. Exits with a friendly error if missing.
+    """
     try:
-        start_date, end_date = get_month_range(args.month)
-        month_label = start_date[:7]  # "YYYY-MM"
-    except ValueError as e:
-        msg = str(e)
-        if args.json_output:
-            print(json.dumps({"error": msg, "code": "INVALID_ARGS"}))
+        import monarchmoney  # noqa: F401
+    except ImportError:
+        if json_output:
+            print(json.dumps({"error": "monarchmoney not installed. Run: pip install -r requirements.txt",
+                              "code": "DEPENDENCY_MISSING"}))
         else:
-            print(f"ERROR: {msg}")
+            print("ERROR: monarchmoney is not installed.")
+            print("       Run: pip install -r requirements.txt")
         sys.exit(1)
 
-    # Load token
-    try:
-        token = load_token(args.session)
-    except (FileNotFoundError, ValueError, json.JSONDecodeError) as e:
-        msg = str(e)
-        if args.json_output:
-            print(json.dumps({"error": msg, "code": "SESSION_ERROR"}))
-        else:
-            print(f"ERROR: {msg}")
-        sys.exit(1)
+
+@contextlib.asynccontextmanager
+async def open_client(token: str):
+    """
+    Yield a MonarchMoney client whose GraphQL calls share one keep-alive
+    connection pool, so consecutive requests skip the TCP/TLS handshake.
+    """
+    import aiohttp
+    from monarchmoney import MonarchMoney
 
     mm = MonarchMoney(token=token)
+    connector = aiohttp.TCPConnector(limit=100, keepalive_timeout=75)
+
+    # monarchmoney builds a fresh gql transport (and aiohttp session) per call;
+    # point each one at the shared connector instead of letting it open its own.
+    if hasattr(mm, "_get_graphql_client"):
+        new_graphql_client = mm._get_graphql_client
+
+        def pooled_graphql_client():
+            client = new_graphql_client()
+            transport = client.transport
+            # Add to the library's own session args (e.g. trust_env) rather than replace them
+            transport.client_session_args = {
+                **(transport.client_session_args or {}),
+                "connector": connector,
+                "connector_owner": False,
+            }
+
+            # gql skips session.close() when it doesn't own the connector, which
+            # leaves every per-call session unclosed. Close it here; with
+            # connector_owner=False that leaves the shared connector open.
+            close_transport = transport.close
+
+            async def close_pooled_transport():
+                if transport.session is not None:
+                    await transport.session.close()
+                await close_transport()
+
+            transport.close = close_pooled_transport
+            return client
+
+        mm._get_graphql_client = pooled_graphql_client
 
-    # Fetch categories to resolve name → ID
     try:
-        categories_data = await mm.get_transaction_categories()
-    except Exception as e:
-        if is_auth_error(e):
-            msg = "Session appears to be expired. Re-run 'python login.py'."
-            code = "SESSION_EXPIRED"
-        else:
-            msg = f"Failed to fetch categories: {e}"
-            code = "API_ERROR"
-        if args.json_output:
-            print(json.dumps({"error": msg, "code": code}))
-        else:
-            print(f"ERROR: {msg}")
-        sys.exit(1)
+        yield mm
+    finally:
+        await connector.close()
 
-    if args.debug:
-        print("[DEBUG] categories_data:", json.dumps(categories_data, indent=2, default=str),
-              file=sys.stderr)
-
-    cat_id, matched_name, all_names = find_category(categories_data, args.category, args.debug)
 
-    if cat_id is None:
-        msg = f"Category '{args.category}' not found."
+async def run(args, mm=None):
+    """
+    Run the report for parsed args. Pass mm to reuse an already-open client
+    (as the monarch CLI does); otherwise one is opened from args.session.
+    """
+    # Parse and validate month
+    try:
+        start_date, end_date = get_month_range(args.month)
+        month_label = start_date[:7]  # "YYYY-MM"
+    except ValueError as e:
+        msg = str(e)
         if args.json_output:
-            print(json.dumps({
-                "error": msg,
-                "code": "CATEGORY_NOT_FOUND",
-                "available_categories": all_names,
-            }))
+            print(json.dumps({"error": msg, "code": "INVALID_ARGS"}))
         else:
             print(f"ERROR: {msg}")
-            print(f"\nAvailable categories:\n  " + "\n  ".join(all_names))
         sys.exit(1)
 
-    # Fetch transactions
+    if mm is None:
+        require_monarchmoney(args.json_output)
+
+        # Load token
+        try:
+            token = load_token(args.session)
+        except (FileNotFoundError, ValueError, json.JSONDecodeError) as e:
+            msg = str(e)
+            if args.json_output:
+                print(json.dumps({"error": msg, "code": "SESSION_ERROR"}))
+            else:
+                print(f"ERROR: {msg}")
+            sys.exit(1)
+        client = open_client(token)
+    else:
+        client = contextlib.nullcontext(mm)
+
+    # Resolve category name → ID, preferring this session's on-disk cache
+    cache_path = session_cache_path(CATEGORY_CACHE_DIR, args.session)
     try:
-        txn_data = await mm.get_transactions(
-            start_date=start_date,
-            end_date=end_date,
-            category_ids=[cat_id],
-            limit=args.limit,
-        )
-    except Exception as e:
-        if is_auth_error(e):
-            msg = "Session appears to be expired. Re-run 'python login.py'."
-            code = "SESSION_EXPIRED"
-        else:
-            msg = f"Failed to fetch transactions: {e}"
-            code = "API_ERROR"
-        if args.json_output:
-            print(json.dumps({"error": msg, "code": code}))
-        else:
-            print(f"ERROR: {msg}")
-        sys.exit(1)
+        session_mtime = os.path.getmtime(args.session)
+    except OSError:
+        session_mtime = None
+    categories_data = None
+    if not args.refresh and session_mtime is not None:
+        categories_data = load_category_cache(cache_path, session_mtime)
+
+    if categories_data is not None:
+        if args.debug:
+            print(f"[DEBUG] Using cached categories from {cache_path}", file=sys.stderr)
+        index, active_categories = build_category_index(categories_data, args.debug)
+        cat_id, matched_name = find_category(index, args.category)
+    else:
+        cat_id = None
+
+    async with client as mm:
+        # Cache miss, or the name isn't in a stale cache — fetch fresh and retry once
+        if cat_id is None:
+            try:
+                categories_data = await mm.get_transaction_categories()
+            except Exception as e:
+                if is_auth_error(e):
+                    msg = "Session appears to be expired. Re-run 'python login.py'."
+                    code = "SESSION_EXPIRED"
+                else:
+                    msg = f"Failed to fetch categories: {e}"
+                    code = "API_ERROR"
+                if args.json_output:
+                    print(json.dumps({"error": msg, "code": code}))
+                else:
+                    print(f"ERROR: {msg}")
+                sys.exit(1)
+
+            if args.debug:
+                print("[DEBUG] categories_data:", file=sys.stderr)
+                write_json(categories_data, sys.stderr, args.debug_max_bytes)
+
+            if session_mtime is not None:
+                save_category_cache(cache_path, session_mtime, categories_data)
+            index, active_categories = build_category_index(categories_data, args.debug)
+            cat_id, matched_name = find_category(index, args.category)
+
+        if cat_id is None:
+            msg = f"Category '{args.category}' not found."
+            all_names = available_names(active_categories)
+            if args.json_output:
+                print(json.dumps({
+                    "error": msg,
+                    "code": "CATEGORY_NOT_FOUND",
+                    "available_categories": all_names,
+                }))
+            else:
+                print(f"ERROR: {msg}")
+                print(f"\nAvailable categories:\n  " + "\n  ".join(all_names))
+            sys.exit(1)
+
+        # Fetch transactions
+        try:
+            txn_data = await mm.get_transactions(
+                start_date=start_date,
+                end_date=end_date,
+                category_ids=[cat_id],
+                limit=args.limit,
+            )
+        except Exception as e:
+            if is_auth_error(e):
+                msg = "Session appears to be expired. Re-run 'python login.py'."
+                code = "SESSION_EXPIRED"
+            else:
+                msg = f"Failed to fetch transactions: {e}"
+                code = "API_ERROR"
+            if args.json_output:
+                print(json.dumps({"error": msg, "code": code}))
+            else:
+                print(f"ERROR: {msg}")
+            sys.exit(1)
 
     if args.debug:
         print("[DEBUG] txn_data keys:", list(txn_data.keys()), file=sys.stderr)
 
     results = (txn_data.get("allTransactions") or {}).get("results", [])
-    transactions = format_transactions(results)
+    transactions, total, has_pending = format_transactions(results)
 
     if args.json_output:
         output = {
             "category": matched_name,
             "month": month_label,
             "transactions": transactions,
-            "total": round(sum(t["amount"] for t in transactions), 2),
+            "total": total,
             "count": len(transactions),
             "generated_at": datetime.now().isoformat(timespec="seconds"),
         }
-        print(json.dumps(output, indent=2))
+        write_json(output)
     else:
-        print_console_report(transactions, matched_name, month_label)
+        print_console_report(transactions, total, has_pending, matched_name, month_label)
 
 
 def main():
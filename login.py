@@ -16,29 +16,35 @@ import json
 import os
 import sys
 
-try:
-    from monarchmoney import MonarchMoney
-except ImportError:
-    print("ERROR: monarchmoney is not installed.")
-    print("       Run: pip install -r requirements.txt")
-    sys.exit(1)
-
 DEFAULT_SESSION_FILE = "session.json"
 
 
-def parse_args():
-    parser = argparse.ArgumentParser(
-        description="Log into Monarch Money and save token to session.json"
-    )
+def add_arguments(parser: argparse.ArgumentParser):
+    """Register this command's options; shared with the monarch CLI subcommand."""
     parser.add_argument(
         "--session",
         default=DEFAULT_SESSION_FILE,
         help=f"Path to write session token (default: {DEFAULT_SESSION_FILE})",
     )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Log into Monarch Money and save token to session.json"
+    )
+    add_arguments(parser)
     return parser.parse_args()
 
 
 async def do_login(session_path: str):
+    # Imported here so --help doesn't pay for loading monarchmoney
+    try:
+        from monarchmoney import MonarchMoney
+    except ImportError:
+        print("ERROR: monarchmoney is not installed.")
+        print("       Run: pip install -r requirements.txt")
+        sys.exit(1)
+
     mm = MonarchMoney()
 
     print("Starting interactive Monarch Money login...")
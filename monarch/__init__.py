@@ -0,0 +1,5 @@
+"""
+monarch — single entry point for the Monarch Money scripts.
+
+Run with `python -m monarch <command>`; see monarch/__main__.py.
+"""
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+monarch — run login, the over-budget report, and category drill-downs from
+one process.
+
+All subcommands share one event loop and, per session file, one pooled
+MonarchMoney client, so the `shell` subcommand can run `budget` followed by
+several `txns` lookups without reconnecting between them.
+
+Usage (from the project root):
+    python -m monarch login
+    python -m monarch budget --threshold 100
+    python -m monarch txns --category "Dining Out" --month 2026-01
+    python -m monarch shell
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import shlex
+import sys
+import threading
+
+import category_transactions
+import login
+import over_budget_report
+
+SHELL_PROMPT = "monarch> "
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="monarch",
+        description="Monarch Money budget tools",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    login.add_arguments(subparsers.add_parser(
+        "login", help="Log in and save the session token",
+    ))
+    over_budget_report.add_arguments(subparsers.add_parser(
+        "budget", help="Report categories over budget this month",
+    ))
+    category_transactions.add_arguments(subparsers.add_parser(
+        "txns", help="List transactions for one budget category",
+    ))
+    subparsers.add_parser(
+        "shell", help="Read commands line by line, reusing the client between them",
+    )
+    return parser
+
+
+class ClientPool:
+    """Lazily opened MonarchMoney clients, one per session file, closed on exit."""
+
+    def __init__(self, stack: contextlib.AsyncExitStack):
+        self._stack = stack
+        self._clients = {}
+
+    async def get(self, args):
+        if args.session not in self._clients:
+            category_transactions.require_monarchmoney(getattr(args, "json_output", False))
+            try:
+                token = category_transactions.load_token(args.session)
+            except (FileNotFoundError, ValueError, json.JSONDecodeError) as e:
+                msg = str(e)
+                if getattr(args, "json_output", False):
+                    print(json.dumps({"error": msg, "code": "SESSION_ERROR"}))
+                else:
+                    print(f"ERROR: {msg}")
+                sys.exit(1)
+            self._clients[args.session] = await self._stack.enter_async_context(
+                category_transactions.open_client(token)
+            )
+        return self._clients[args.session]
+
+    def forget(self, session_path: str):
+        # The old client keeps its stale token; a fresh one is opened on next use
+        self._clients.pop(session_path, None)
+
+
+async def dispatch(args, pool: ClientPool):
+    if args.command == "login":
+        await login.do_login(args.session)
+        pool.forget(args.session)
+    elif args.command == "budget":
+        await over_budget_report.run(args, await pool.get(args))
+    elif args.command == "txns":
+        await category_transactions.run(args, await pool.get(args))
+
+
+def read_line(prompt: str) -> asyncio.Future:
+    """
+    Read one line of input on a daemon thread. Unlike asyncio.to_thread, an
+    abandoned read (Ctrl-C at the prompt) never holds up event loop shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(callback, value):
+        if not future.done():
+            callback(value)
+
+    def reader():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(resolve, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(resolve, future.set_result, line)
+
+    threading.Thread(target=reader, daemon=True).start()
+    return future
+
+
+async def shell(parser: argparse.ArgumentParser, pool: ClientPool):
+    """Run subcommands typed one per line until 'exit' or EOF."""
+    print("Type a command (budget, txns, login) or 'exit'. Add -h for options.")
+    while True:
+        try:
+            line = await read_line(SHELL_PROMPT)
+        except EOFError:
+            print()
+            return
+        try:
+            argv = shlex.split(line)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            continue
+        if not argv:
+            continue
+        if argv[0] in ("exit", "quit"):
+            return
+        if argv[0] == "shell":
+            print("ERROR: already in the shell.")
+            continue
+
+        # Commands report failures via sys.exit(); keep the shell alive instead,
+        # and likewise for anything unexpected a single command raises
+        try:
+            await dispatch(parser.parse_args(argv), pool)
+        except SystemExit:
+            pass
+        except Exception as e:
+            print(f"ERROR: {e}")
+
+
+async def main_async(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    async with contextlib.AsyncExitStack() as stack:
+        pool = ClientPool(stack)
+        if args.command == "shell":
+            await shell(parser, pool)
+        else:
+            await dispatch(args, pool)
+
+
+def main():
+    try:
+        asyncio.run(main_async())
+    except KeyboardInterrupt:
+        # Clients are already closed by the exit stack; exit without joining
+        # a reader thread that may still be blocked in input()
+        print()
+        sys.stdout.flush()
+        os._exit(130)
+
+
+if __name__ == "__main__":
+    main()
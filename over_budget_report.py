@@ -9,35 +9,53 @@ Usage:
     python over_budget_report.py --threshold 100
     python over_budget_report.py --json
     python over_budget_report.py --debug
+    python over_budget_report.py --expand-top 3
     python over_budget_report.py --session /custom/path/session.json
 """
 
 import argparse
 import asyncio
+import contextlib
+import heapq
 import json
 import os
 import sys
+import time
 from datetime import date, datetime
 
-try:
-    from monarchmoney import MonarchMoney
-except ImportError:
-    if "--json" in sys.argv:
-        print(json.dumps({"error": "monarchmoney not installed. Run: pip install -r requirements.txt",
-                          "code": "DEPENDENCY_MISSING"}))
-    else:
-        print("ERROR: monarchmoney is not installed.")
-        print("       Run: pip install -r requirements.txt")
-    sys.exit(1)
+import category_transactions
 
 DEFAULT_SESSION_FILE = "session.json"
 DEFAULT_THRESHOLD = 50.0
+EXPAND_LIMIT_PER_CATEGORY = 200
+BUDGET_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".monarch", "budget_cache")
+DEFAULT_CACHE_TTL = 900  # seconds
 
 
-def parse_args():
-    parser = argparse.ArgumentParser(
-        description="Report Monarch Money budget categories over a spending threshold"
-    )
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type for counts where 0 means "off"."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {number}")
+    return number
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Register this command's options; shared with the monarch CLI subcommand."""
     parser.add_argument(
         "--session",
         default=DEFAULT_SESSION_FILE,
@@ -60,25 +78,93 @@ def parse_args():
         action="store_true",
         help="Dump the raw API response to stderr for troubleshooting",
     )
+    parser.add_argument(
+        "--debug-max-bytes",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Truncate each --debug JSON dump to N bytes (default: 0, no limit)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_CACHE_TTL,
+        metavar="SECONDS",
+        help=f"Reuse cached budget data for the current month up to this age "
+             f"(default: {DEFAULT_CACHE_TTL}; 0 disables the cache)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached budget data and fetch fresh (the cache is still updated)",
+    )
+    parser.add_argument(
+        "--top",
+        type=positive_int,
+        default=None,
+        metavar="K",
+        help="Show only the K worst categories in the console table (JSON always lists all)",
+    )
+    parser.add_argument(
+        "--expand-top",
+        type=non_negative_int,
+        default=0,
+        metavar="N",
+        help="Also list transactions for the N worst categories, fetched in one batched request",
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Report Monarch Money budget categories over a spending threshold"
+    )
+    add_arguments(parser)
     return parser.parse_args()
 
 
-def load_token(session_path: str) -> str:
-    """Load the auth token from session.json."""
-    if not os.path.exists(session_path):
-        raise FileNotFoundError(
-            f"Session file not found: {session_path}\n"
-            "Run 'python login.py' to create it."
-        )
-    with open(session_path, "r") as f:
-        data = json.load(f)
-    token = data.get("token")
-    if not token:
-        raise ValueError(
-            f"'token' key missing or empty in {session_path}.\n"
-            "Re-run 'python login.py' to regenerate the session file."
-        )
-    return token
+def load_budget_cache(cache_path: str, session_mtime: float, month: str,
+                      ttl_seconds: int) -> tuple[dict, str] | None:
+    """
+    Return (budget_data, fetched_at) cached for month ("YYYY-MM") if it was
+    written for this session_mtime (i.e. not before a re-login) and is younger
+    than ttl_seconds, otherwise None.
+    """
+    if ttl_seconds <= 0:
+        return None
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        if cached["session_mtime"] != session_mtime or cached["month"] != month:
+            return None
+        fetched_at = cached["fetched_at"]
+        age = time.time() - datetime.fromisoformat(fetched_at).timestamp()
+        budget_data = cached["budget_data"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if age > ttl_seconds:
+        return None
+    return budget_data, fetched_at
+
+
+def save_budget_cache(cache_path: str, session_mtime: float, month: str,
+                      budget_data: dict, fetched_at: str):
+    """
+    Write budget_data to this session's cache file. Each session keeps a single
+    file, overwritten on every fetch, so re-logins and new months don't pile up.
+    """
+    cached = {
+        "fetched_at": fetched_at,
+        "session_mtime": session_mtime,
+        "month": month,
+        "budget_data": budget_data,
+    }
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(cached, f, default=str)
+    except OSError:
+        # Caching is best-effort; the report already has its data
+        pass
 
 
 def get_target_month() -> str:
@@ -105,17 +191,15 @@ def build_category_lookup(budget_data: dict) -> dict:
     return lookup
 
 
-def extract_over_budget(budget_data: dict, threshold: float, debug: bool) -> list:
+def iter_over_budget(budget_data: dict, target_month: str, threshold: float, debug: bool):
     """
-    Traverse the budget API response and return categories where
-    actual - planned >= threshold for the current month.
+    Traverse the budget API response and yield a row for each category where
+    actual - planned >= threshold in target_month ("YYYY-MM"), in API order.
     """
     if debug:
         print("[DEBUG] Raw budget_data keys:", list(budget_data.keys()), file=sys.stderr)
 
     category_lookup = build_category_lookup(budget_data)
-    target_month = get_target_month()  # e.g. "2026-02"
-    over_budget = []
 
     # The API returns budgetData with monthlyAmountsByCategory
     budget_section = budget_data.get("budgetData", {})
@@ -127,14 +211,16 @@ def extract_over_budget(budget_data: dict, threshold: float, debug: bool) -> lis
         print(f"[DEBUG] monthlyAmountsByCategory entries: {len(monthly_by_cat)}", file=sys.stderr)
 
     for entry in monthly_by_cat:
-        cat_obj = entry.get("category", {})
-        cat_id = cat_obj.get("id")
-        monthly_amounts = entry.get("monthlyAmounts", [])
-
-        for month_entry in monthly_amounts:
-            month_str = month_entry.get("month", "")
-            # month_str is "YYYY-MM-DD"; compare only the YYYY-MM prefix
-            if not month_str.startswith(target_month):
+        cat_id = entry.get("category", {}).get("id")
+        # Resolve the category once per entry rather than per matching month;
+        # ids missing from categoryGroups are still reported, by id.
+        cat_info = category_lookup.get(cat_id)
+        if cat_info is None:
+            cat_info = {"name": f"ID:{cat_id}", "group": "Unknown"}
+
+        for month_entry in entry.get("monthlyAmounts", []):
+            # month is "YYYY-MM-DD"; compare only the YYYY-MM prefix
+            if month_entry.get("month", "")[:7] != target_month:
                 continue
 
             planned = float(month_entry.get("plannedCashFlowAmount") or 0)
@@ -146,22 +232,74 @@ def extract_over_budget(budget_data: dict, threshold: float, debug: bool) -> lis
 
             overage = actual - planned
             if overage >= threshold:
-                cat_info = category_lookup.get(cat_id, {})
-                over_budget.append({
-                    "category": cat_info.get("name", f"ID:{cat_id}"),
-                    "group": cat_info.get("group", "Unknown"),
+                yield {
+                    "category_id": cat_id,
+                    "category": cat_info["name"],
+                    "group": cat_info["group"],
                     "planned": round(planned, 2),
                     "actual": round(actual, 2),
                     "overage": round(overage, 2),
-                })
+                }
+
+
+def extract_over_budget(budget_data: dict, target_month: str, threshold: float,
+                        debug: bool) -> tuple[list, float]:
+    """
+    Return (categories, total_overage) for every over-budget category in
+    target_month, sorted worst offender first.
+    """
+    over_budget = []
+    total_overage = 0.0
+    for row in iter_over_budget(budget_data, target_month, threshold, debug):
+        total_overage += row["overage"]
+        over_budget.append(row)
 
     # Sort worst offenders first
     over_budget.sort(key=lambda x: x["overage"], reverse=True)
-    return over_budget
+    return over_budget, round(total_overage, 2)
+
+
+def top_over_budget(budget_data: dict, target_month: str, threshold: float, k: int,
+                    debug: bool) -> tuple[list, float, int]:
+    """
+    Return (top_k, total_overage, count): the k worst categories via a
+    bounded heap, plus the total and count across all over-budget categories.
+    """
+    total_overage = 0.0
+    count = 0
+
+    def tally(rows):
+        nonlocal total_overage, count
+        for row in rows:
+            total_overage += row["overage"]
+            count += 1
+            yield row
+
+    rows = iter_over_budget(budget_data, target_month, threshold, debug)
+    top = heapq.nlargest(k, tally(rows), key=lambda x: x["overage"])
+    return top, round(total_overage, 2), count
+
+
+def bucket_transactions(results: list, category_ids: list) -> dict:
+    """
+    Split one batched transaction result into { category_id: [raw_txn, ...] },
+    keeping only the requested categories.
+    """
+    buckets = {cat_id: [] for cat_id in category_ids}
+    for txn in results:
+        cat = txn.get("category")
+        cat_id = cat.get("id") if cat else None
+        if cat_id in buckets:
+            buckets[cat_id].append(txn)
+    return buckets
 
 
-def print_console_report(over_budget: list, threshold: float, month: str):
-    """Print a formatted, aligned table to stdout."""
+def print_console_report(over_budget: list, total_overage: float, threshold: float, month: str,
+                         total_count: int | None = None):
+    """
+    Print a formatted, aligned table to stdout. total_count is the number of
+    over-budget categories when over_budget holds only the top few.
+    """
     width = 68
     print()
     print(f"  Monarch Money Over-Budget Report")
@@ -178,77 +316,175 @@ def print_console_report(over_budget: list, threshold: float, month: str):
     print(f"  {'Category':<28} {'Group':<18} {'Planned':>9} {'Actual':>9} {'Over By':>9}")
     print(f"  {'-' * 28} {'-' * 18} {'-' * 9} {'-' * 9} {'-' * 9}")
 
-    for item in over_budget:
-        cat = item["category"][:27]
-        grp = item["group"][:17]
-        print(
-            f"  {cat:<28} {grp:<18}"
-            f"  ${item['planned']:>8.2f}  ${item['actual']:>8.2f}  ${item['overage']:>8.2f}"
-        )
+    # Format every row with one bound method and emit them in a single write
+    row = "  {:<28} {:<18}  ${:>8.2f}  ${:>8.2f}  ${:>8.2f}\n".format
+    sys.stdout.write("".join(
+        row(i["category"][:27], i["group"][:17], i["planned"], i["actual"], i["overage"])
+        for i in over_budget
+    ))
 
-    total = sum(i["overage"] for i in over_budget)
-    count = len(over_budget)
+    count = len(over_budget) if total_count is None else total_count
     print(f"  {'-' * width}")
     print(f"  {count} categor{'y' if count == 1 else 'ies'} over budget.  "
-          f"Total overage: ${total:.2f}")
+          f"Total overage: ${total_overage:.2f}")
+    if len(over_budget) < count:
+        print(f"  Showing the top {len(over_budget)}.")
     print()
 
 
-def is_auth_error(exc: Exception) -> bool:
-    msg = str(exc).lower()
-    return any(s in msg for s in ["unauthorized", "401", "403", "forbidden", "token", "auth"])
-
-
-async def run(args):
-    # Load token
-    try:
-        token = load_token(args.session)
-    except (FileNotFoundError, ValueError, json.JSONDecodeError) as e:
-        msg = str(e)
-        if args.json_output:
-            print(json.dumps({"error": msg, "code": "SESSION_ERROR"}))
-        else:
-            print(f"ERROR: {msg}")
-        sys.exit(1)
+async def run(args, mm=None):
+    """
+    Run the report for parsed args. Pass mm to reuse an already-open client
+    (as the monarch CLI does); otherwise one is opened from args.session.
+    """
+    if mm is None:
+        category_transactions.require_monarchmoney(args.json_output)
+
+        # Load token
+        try:
+            token = category_transactions.load_token(args.session)
+        except (FileNotFoundError, ValueError, json.JSONDecodeError) as e:
+            msg = str(e)
+            if args.json_output:
+                print(json.dumps({"error": msg, "code": "SESSION_ERROR"}))
+            else:
+                print(f"ERROR: {msg}")
+            sys.exit(1)
+        client = category_transactions.open_client(token)
+    else:
+        client = contextlib.nullcontext(mm)
 
-    mm = MonarchMoney(token=token)
+    target_month = get_target_month()  # e.g. "2026-02"
 
-    # Fetch budgets
-    try:
-        budget_data = await mm.get_budgets()
-    except Exception as e:
-        if is_auth_error(e):
-            msg = ("Session appears to be expired or invalid. "
-                   "Re-run 'python login.py' to refresh the session.")
-            code = "SESSION_EXPIRED"
+    async with client as mm:
+        cache_path = category_transactions.session_cache_path(BUDGET_CACHE_DIR, args.session)
+        try:
+            session_mtime = os.path.getmtime(args.session)
+        except OSError:
+            session_mtime = None
+        cached = None
+        if not args.refresh and session_mtime is not None:
+            cached = load_budget_cache(cache_path, session_mtime, target_month, args.cache_ttl)
+        if cached is not None:
+            budget_data, fetched_at = cached
+            if args.debug:
+                print(f"[DEBUG] Using budget data for {target_month} cached at {fetched_at}",
+                      file=sys.stderr)
         else:
-            msg = f"Failed to fetch budget data: {e}"
-            code = "API_ERROR"
-
-        if args.json_output:
-            print(json.dumps({"error": msg, "code": code}))
+            budget_data = None
+
+        # Fetch budgets
+        if budget_data is None:
+            try:
+                budget_data = await mm.get_budgets()
+            except Exception as e:
+                if category_transactions.is_auth_error(e):
+                    msg = ("Session appears to be expired or invalid. "
+                           "Re-run 'python login.py' to refresh the session.")
+                    code = "SESSION_EXPIRED"
+                else:
+                    msg = f"Failed to fetch budget data: {e}"
+                    code = "API_ERROR"
+
+                if args.json_output:
+                    print(json.dumps({"error": msg, "code": code}))
+                else:
+                    print(f"ERROR: {msg}")
+                sys.exit(1)
+
+            fetched_at = datetime.now().isoformat(timespec="seconds")
+            if args.cache_ttl > 0 and session_mtime is not None:
+                save_budget_cache(cache_path, session_mtime, target_month, budget_data, fetched_at)
+
+        if args.debug:
+            print("[DEBUG] Full API response:", file=sys.stderr)
+            category_transactions.write_json(budget_data, sys.stderr, args.debug_max_bytes)
+
+        # The console only needs the worst few rows when --top is given; JSON
+        # consumers always get the full sorted list.
+        total_count = None
+        if args.top is not None and not args.json_output:
+            over_budget, total_overage, total_count = top_over_budget(
+                budget_data, target_month, args.threshold, args.top, args.debug
+            )
         else:
-            print(f"ERROR: {msg}")
-        sys.exit(1)
-
-    if args.debug:
-        print("[DEBUG] Full API response:", file=sys.stderr)
-        print(json.dumps(budget_data, indent=2, default=str), file=sys.stderr)
-
-    over_budget = extract_over_budget(budget_data, args.threshold, args.debug)
-    target_month = get_target_month()
+            over_budget, total_overage = extract_over_budget(
+                budget_data, target_month, args.threshold, args.debug
+            )
+
+        # Drill into the worst offenders with a single multi-category request
+        # rather than one category_transactions.py run per category.
+        expanded = []
+        expand_truncated = False
+        worst = over_budget[:args.expand_top]
+        if worst:
+            start_date, end_date = category_transactions.get_month_range(target_month)
+            top_ids = [item["category_id"] for item in worst]
+            expand_limit = len(top_ids) * EXPAND_LIMIT_PER_CATEGORY
+            try:
+                txn_data = await mm.get_transactions(
+                    start_date=start_date,
+                    end_date=end_date,
+                    category_ids=top_ids,
+                    limit=expand_limit,
+                )
+            except Exception as e:
+                if category_transactions.is_auth_error(e):
+                    msg = ("Session appears to be expired or invalid. "
+                           "Re-run 'python login.py' to refresh the session.")
+                    code = "SESSION_EXPIRED"
+                else:
+                    msg = f"Failed to fetch transactions: {e}"
+                    code = "API_ERROR"
+
+                if args.json_output:
+                    print(json.dumps({"error": msg, "code": code}))
+                else:
+                    print(f"ERROR: {msg}")
+                sys.exit(1)
+
+            all_transactions = txn_data.get("allTransactions") or {}
+            results = all_transactions.get("results", [])
+            # The limit is shared by all categories, so one busy category can
+            # crowd out the rest; flag it rather than show partial lists silently.
+            matched = all_transactions.get("totalCount") or 0
+            expand_truncated = matched > len(results)
+            if expand_truncated:
+                print(f"WARNING: --expand-top fetched {len(results)} of {matched} transactions; "
+                      "per-category lists and totals may be incomplete.", file=sys.stderr)
+            buckets = bucket_transactions(results, top_ids)
+            for item in worst:
+                transactions, total, has_pending = category_transactions.format_transactions(
+                    buckets[item["category_id"]]
+                )
+                expanded.append({
+                    "category": item["category"],
+                    "transactions": transactions,
+                    "total": total,
+                    "count": len(transactions),
+                    "has_pending": has_pending,
+                })
 
     if args.json_output:
         output = {
             "month": target_month,
             "threshold": args.threshold,
             "over_budget": over_budget,
-            "total_overage": round(sum(i["overage"] for i in over_budget), 2),
+            "total_overage": total_overage,
             "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "fetched_at": fetched_at,
         }
-        print(json.dumps(output, indent=2))
+        if args.expand_top > 0:
+            output["expanded"] = expanded
+            output["expanded_truncated"] = expand_truncated
+        category_transactions.write_json(output)
     else:
-        print_console_report(over_budget, args.threshold, target_month)
+        print_console_report(over_budget, total_overage, args.threshold, target_month, total_count)
+        for section in expanded:
+            category_transactions.print_console_report(
+                section["transactions"], section["total"], section["has_pending"],
+                section["category"], target_month,
+            )
 
 
 def main():